@@ -12,19 +12,36 @@
 每組包含 t-分佈疊圖與 KDE 疊圖，並在波峰處標記偏差數值。
 """
 
+import os
+import functools
+import matplotlib
+
+# 批次輸出 PNG 時使用非互動式的 Agg 後端；設定環境變數 INTERACTIVE=1 可恢復彈出視窗
+INTERACTIVE = os.environ.get('INTERACTIVE', '0') not in ('', '0')
+if not INTERACTIVE:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats as stats
 import matplotlib.font_manager as fm
-from scipy.stats import gaussian_kde
-import os
+from scipy.special import gammaln
+
+
+# 已載入的中文字型屬性 (由 set_chinese_font 設定)
+_FONT_PROP = None
 
 
 def set_chinese_font():
     """
     自動檢測並設定可用的中文字型，以解決 Matplotlib 中文顯示問題。
     (Codespaces 強力修正版)
+    只會實際執行一次，之後的呼叫直接回傳先前的結果。
     """
+    global _FONT_PROP
+    if getattr(set_chinese_font, '_done', False):
+        return _FONT_PROP is not None
+    set_chinese_font._done = True
+
     print("正在設定中文字型...")
     plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial']
     plt.rcParams['axes.unicode_minus'] = False
@@ -32,9 +49,11 @@ def set_chinese_font():
     codespace_font_path = '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc'
     if os.path.exists(codespace_font_path):
         print(f"成功找到字型檔案 (via path): {codespace_font_path}")
-        font_prop = fm.FontProperties(fname=codespace_font_path)
-        plt.rcParams['font.sans-serif'].insert(0, font_prop.get_name())
-        print(f"成功設定字型: {font_prop.get_name()}")
+        # 向字型管理器註冊一次，之後依名稱查找即可直接命中
+        fm.fontManager.addfont(codespace_font_path)
+        _FONT_PROP = fm.FontProperties(fname=codespace_font_path)
+        plt.rcParams['font.sans-serif'].insert(0, _FONT_PROP.get_name())
+        print(f"成功設定字型: {_FONT_PROP.get_name()}")
         return True
     else:
         print(f"警告：找不到指定的字型檔案: {codespace_font_path}")
@@ -44,6 +63,66 @@ def set_chinese_font():
         return False
 
 
+def t_log_norm(df, scale):
+    """
+    計算 t-分佈機率密度的對數正規化常數 (即 loc 處波峰高度的對數)。
+    """
+    return gammaln((df + 1) / 2) - gammaln(df / 2) - 0.5 * np.log(df * np.pi) - np.log(scale)
+
+
+def t_pdf(x, df, loc, scale):
+    """
+    以封閉公式直接計算 t-分佈機率密度，
+    避免 stats.t.pdf 的通用參數檢查與分派開銷。
+    """
+    z = (x - loc) / scale
+    return np.exp(t_log_norm(df, scale) - ((df + 1) / 2) * np.log1p(z * z / df))
+
+
+def fast_kde_1d(samples, x_eval, bandwidth=None):
+    """
+    直接以高斯核加總計算一維 KDE，省去 gaussian_kde 的共變異數分解開銷。
+    頻寬沿用 gaussian_kde 預設的 Scott 法則，曲線與原本一致；
+    若呼叫端已算出樣本標準偏差，可直接傳入 bandwidth 省去重算。
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    if n < 2:
+        raise ValueError("KDE 至少需要 2 筆數據")
+    h = np.std(samples, ddof=1) * n ** (-0.2) if bandwidth is None else bandwidth
+    if not h > 0:
+        raise np.linalg.LinAlgError("數據變異數為零，無法估計 KDE 頻寬")
+    z = (x_eval[:, None] - samples[None, :]) / h
+    return np.exp(-0.5 * z * z).sum(axis=1) / (n * h * np.sqrt(2 * np.pi))
+
+
+def t_peak_density(df, scale):
+    """
+    t-分佈波峰 (位於 loc) 的機率密度：Γ((df+1)/2) / (Γ(df/2)·√(df·π)·scale)。
+    """
+    return np.exp(t_log_norm(df, scale))
+
+
+@functools.lru_cache(maxsize=8)
+def _make_x_curve(x_min, x_max):
+    """
+    快取共用的 X 軸取樣點 (唯讀陣列)，相同範圍不重複配置。
+    """
+    x_curve = np.linspace(x_min, x_max, 1000)
+    x_curve.setflags(write=False)
+    return x_curve
+
+
+@functools.lru_cache(maxsize=8)
+def _make_colors(k):
+    """
+    快取 k 個儀器所用的 viridis 顏色陣列 (唯讀)。
+    """
+    colors = plt.cm.viridis(np.linspace(0, 1, k))
+    colors.setflags(write=False)
+    return colors
+
+
 def generate_overlay_plots(group_name, experiments_in_group, output_dir):
     """
     為指定的一組儀器生成基於相對誤差 (%) 的 t-分佈疊圖與 KDE 疊圖，
@@ -51,25 +130,37 @@ def generate_overlay_plots(group_name, experiments_in_group, output_dir):
     """
     print(f"\n--- 開始處理分組：{group_name} ---")
 
-    results = {}
-    all_relative_errors = []
+    names = [exp[0] for exp in experiments_in_group]
+    targets = np.array([exp[1] for exp in experiments_in_group], dtype=float)
+    densities = np.array([exp[2] for exp in experiments_in_group], dtype=float)
+    weight_arrays = [np.asarray(exp[3], dtype=float) for exp in experiments_in_group]
+    lengths = np.array([len(w) for w in weight_arrays])
+
+    # 一次計算整組儀器的相對誤差 (%) 及其統計值
+    if np.all(lengths == lengths[0]):
+        # 樣本數相同：堆疊為 2D 陣列，每列對應一個儀器
+        rel = (np.vstack(weight_arrays) / densities[:, None] / targets[:, None]) * 100.0 - 100.0
+        all_relative_errors = rel.ravel()
+        rel_errors_list = list(rel)
+        mus = rel.mean(axis=1)
+        sigmas = rel.std(axis=1, ddof=1)
+    else:
+        # 樣本數不同：串接為 1D 陣列，以索引陣列標記所屬儀器
+        owner = np.repeat(np.arange(len(names)), lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        all_relative_errors = (np.concatenate(weight_arrays) / densities[owner] / targets[owner]) * 100.0 - 100.0
+        rel_errors_list = np.split(all_relative_errors, starts[1:])
+        mus = np.add.reduceat(all_relative_errors, starts) / lengths
+        sigmas = np.sqrt(np.add.reduceat((all_relative_errors - mus[owner]) ** 2, starts) / (lengths - 1))
 
-    # 計算每個儀器的相對誤差及其統計值
-    for name, target, density, weights in experiments_in_group:
+    results = {}
+    for name, rel_errors, mu_err, sigma_err, n in zip(names, rel_errors_list, mus, sigmas, lengths):
         print(f"  處理: {name}")
-        abs_volumes = weights / density
-        rel_volumes = (abs_volumes / target) * 100.0
-        rel_errors = rel_volumes - 100.0  # 轉換為相對誤差 (%)
-        all_relative_errors.extend(rel_errors)
-        mu_err = np.mean(rel_errors)
-        sigma_err = np.std(rel_errors, ddof=1)
-        n = len(rel_errors)
-        df = n - 1
         results[name] = {
             'relative_errors': rel_errors,
             'mu_err': mu_err,
             'sigma_err': sigma_err,
-            'df': df
+            'df': n - 1
         }
         print(f"    平均誤差 (%): {mu_err:.3f}, 誤差標準差 (%): {sigma_err:.3f}")
 
@@ -84,20 +175,20 @@ def generate_overlay_plots(group_name, experiments_in_group, output_dir):
     print(f"  {group_name} 通用 X 軸範圍設定為: {x_min:.1f}% 到 {x_max:.1f}%")
 
     # 為每個儀器指定顏色
-    colors = plt.cm.viridis(np.linspace(0, 1, len(experiments_in_group)))
+    colors = _make_colors(len(experiments_in_group))
     instrument_colors = {name: colors[i] for i, name in enumerate(results.keys())}
 
     # 圖 A：疊加 t 分佈曲線
     print(f"  正在生成圖 A ({group_name})：疊加 t-分佈曲線")
-    plt.figure(figsize=(12, 7))
+    fig = plt.figure(figsize=(12, 7))
     ax_t = plt.gca()
-    x_curve = np.linspace(x_min, x_max, 1000)
+    x_curve = _make_x_curve(float(x_min), float(x_max))
 
     for name, res in results.items():
-        y_curve_t = stats.t.pdf(x_curve, df=res['df'], loc=res['mu_err'], scale=res['sigma_err'])
-        ax_t.plot(x_curve, y_curve_t, color=instrument_colors[name], linewidth=2,
+        y_curve_t = t_pdf(x_curve, res['df'], res['mu_err'], res['sigma_err'])
+        ax_t.plot(x_curve, y_curve_t, color=instrument_colors[name], linewidth=2, rasterized=True,
                   label=f"{name} (平均誤差={res['mu_err']:.2f}%, σ={res['sigma_err']:.2f}%)")
-        peak_t_y = stats.t.pdf(res['mu_err'], df=res['df'], loc=res['mu_err'], scale=res['sigma_err'])
+        peak_t_y = t_peak_density(res['df'], res['sigma_err'])
         ax_t.plot(res['mu_err'], peak_t_y, 'k.', markersize=10)
         ax_t.text(res['mu_err'], peak_t_y, f" {res['mu_err']:.2f}%",
                   color='black', fontsize=9, ha='left', va='bottom')
@@ -111,25 +202,34 @@ def generate_overlay_plots(group_name, experiments_in_group, output_dir):
     ax_t.set_xlim(x_min, x_max)
     ax_t.legend(loc='best')
     ax_t.grid(True, linestyle=':', alpha=0.6)
-    plt.tight_layout()
 
     safe_group_name = group_name.replace(' ', '_').replace('/', '_')
     file_name_t = os.path.join(output_dir, f"overlay_t_error_{safe_group_name}.png")
-    plt.savefig(file_name_t, dpi=300)
-    plt.show()
+    with open(file_name_t, 'wb') as f:
+        fig.canvas.print_figure(f, format='png', dpi=300, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     print(f"  圖 A ({group_name}) 已儲存至: {file_name_t}")
 
     # 圖 B：疊加 KDE 曲線
     print(f"  正在生成圖 B ({group_name})：疊加 KDE 曲線")
-    plt.figure(figsize=(12, 7))
+    fig = plt.figure(figsize=(12, 7))
     ax_kde = plt.gca()
 
     for name, res in results.items():
+        # 數據完全無變異時無法估計 KDE，先行略過而不進入例外處理
+        if np.ptp(res['relative_errors']) < 1e-12:
+            print(f"    KDE 警告 ({name})：數據無變異，無法繪製曲線")
+            ax_kde.plot([], [], color=instrument_colors[name], linestyle='--',
+                        label=f"{name} (KDE 失敗)")
+            continue
         try:
-            kde = gaussian_kde(res['relative_errors'])
-            y_curve_kde = kde(x_curve)
+            # Scott 頻寬 = σ·n^(-1/5)，直接沿用已算出的 sigma_err
+            bandwidth = res['sigma_err'] * len(res['relative_errors']) ** (-0.2)
+            y_curve_kde = fast_kde_1d(res['relative_errors'], x_curve, bandwidth)
             ax_kde.plot(x_curve, y_curve_kde, color=instrument_colors[name], linestyle='--', linewidth=2,
-                        label=f"{name}")
+                        rasterized=True, label=f"{name}")
             kde_peak_idx = np.argmax(y_curve_kde)
             kde_peak_x = x_curve[kde_peak_idx]
             kde_peak_y = y_curve_kde[kde_peak_idx]
@@ -148,11 +248,13 @@ def generate_overlay_plots(group_name, experiments_in_group, output_dir):
     ax_kde.set_xlim(x_min, x_max)
     ax_kde.legend(loc='best')
     ax_kde.grid(True, linestyle=':', alpha=0.6)
-    plt.tight_layout()
 
     file_name_kde = os.path.join(output_dir, f"overlay_kde_error_{safe_group_name}.png")
-    plt.savefig(file_name_kde, dpi=300)
-    plt.show()
+    with open(file_name_kde, 'wb') as f:
+        fig.canvas.print_figure(f, format='png', dpi=300, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     print(f"  圖 B ({group_name}) 已儲存至: {file_name_kde}")
 
 
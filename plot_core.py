@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+儀器體積不確定度分析 - 共用繪圖核心
+
+收錄 v2 (完整版，含 KDE 曲線與截尾平均) 與 v11 (結報濃縮版，含 ±3σ 線)
+兩支腳本共用的分析與繪圖流程，兩者只是以 style 參數選擇不同樣式：
+    style='full'       -> output05/*_analysis_plot.png
+    style='condensed'  -> output_condensed_with_sigma_lines/*_condensed_sigma_plot.png
+
+直接執行 `python -m plot_core` 會在同一個 Python 行程中依序產生兩種圖表，
+matplotlib / scipy 的匯入與字型設定只需進行一次。
+
+== 執行需求 ==
+Python 3
+pip install numpy matplotlib scipy
+pip install numba  (選用，可加速 sample_stats 的統計計算；python sample_stats.py 可預先編譯)
+"""
+
+import io
+import os
+import sys
+import matplotlib
+
+# 批次輸出 PNG 時使用非互動式的 Agg 後端；設定環境變數 INTERACTIVE=1 可恢復彈出視窗
+INTERACTIVE = os.environ.get('INTERACTIVE', '0') not in ('', '0')
+if not INTERACTIVE:
+    matplotlib.use('Agg')
+
+# 設定環境變數 VERBOSE=0 可關閉每個儀器的診斷訊息 (例如大量重複呼叫時)
+VERBOSE = os.environ.get('VERBOSE', '1') != '0'
+
+import matplotlib.pyplot as plt
+import numpy as np
+import scipy.stats as stats
+import matplotlib.font_manager as fm
+from matplotlib.colors import to_rgba
+from sample_stats import compute_pipeline
+
+# 標準化 (以 σ 為單位) 的 X 軸取樣點，各儀器以 mu + sigma * X_CURVE_STD 縮放後共用
+X_CURVE_STD = np.linspace(-4, 4, 1000)
+
+# 各樣式的預設輸出資料夾與檔名後綴
+STYLE_OUTPUTS = {
+    'full': ("output05", "_analysis_plot.png"),
+    'condensed': ("output_condensed_with_sigma_lines", "_condensed_sigma_plot.png"),
+}
+
+# --- 1. 定義所有實驗數據 ---
+# (instrument_name, target_volume, density, weights_array)
+ALL_EXPERIMENTS = [
+    (
+        "1mL刻度吸管", 1.0, 0.9968,
+        np.array([0.7517, 0.9122, 0.9343, 0.9174, 1.0165, 1.0071])
+    ),
+    (
+        "10mL刻度吸管", 10.0, 0.9968,
+        np.array([9.9094, 9.8970, 9.8806, 9.9107, 9.8025, 9.7799])
+    ),
+    (
+        "1mL滴定管", 1.0, 0.9968,
+        np.array([1.1935, 1.0952, 1.0515, 0.9904, 1.0004, 1.0601])
+    ),
+    (
+        "10mL滴定管", 10.0, 0.9968,
+        np.array([10.0740, 10.0338, 9.8277, 10.0358, 9.426, 10.1115])
+    ),
+    (
+        "1000μL微量吸管", 1.0, 0.9968,
+        np.array([0.9933, 0.9678, 0.9998, 0.9914, 0.9845, 0.9823])
+    )
+]
+
+# 已載入的中文字型屬性 (由 set_chinese_font 設定)
+_FONT_PROP = None
+
+def set_chinese_font():
+    """
+    自動檢測並設定可用的中文字型，以解決 Matplotlib 中文顯示問題。
+    (Codespaces 強力修正版)
+    只會實際執行一次，之後的呼叫直接回傳先前的結果。
+    """
+    global _FONT_PROP
+    if getattr(set_chinese_font, '_done', False):
+        return _FONT_PROP is not None
+    set_chinese_font._done = True
+
+    print("正在設定中文字型...")
+
+    # Matplotlib 的預設 sans-serif 字體
+    plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial']
+    plt.rcParams['axes.unicode_minus'] = False # 解決負號顯示問題
+
+    # --- 我們不再猜測名稱，而是直接檢查 Codespaces 中字型的「檔案路徑」---
+    codespace_font_path = '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc'
+
+    if os.path.exists(codespace_font_path):
+        print(f"成功找到字型檔案 (via path): {codespace_font_path}")
+        # 向字型管理器註冊一次，之後依名稱查找即可直接命中
+        fm.fontManager.addfont(codespace_font_path)
+        # 直接從「檔案路徑」載入字型屬性
+        _FONT_PROP = fm.FontProperties(fname=codespace_font_path)
+        # 將字型名稱（從檔案中讀取）插入到 Matplotlib 的設定中
+        plt.rcParams['font.sans-serif'].insert(0, _FONT_PROP.get_name())
+        print(f"成功設定字型: {_FONT_PROP.get_name()}")
+        return True
+    else:
+        # 如果連檔案都找不到，才發出警告
+        print(f"警告：找不到指定的字型檔案: {codespace_font_path}")
+        print("圖表中的中文標籤可能顯示為方塊 (□)。")
+        print("請確認您已在 Codespaces 終端機中執行過:")
+        print("sudo apt-get update && sudo apt-get install -y fonts-wqy-zenhei")
+        return False
+
+def _analyze_and_plot(instrument_name, target_volume, density, raw_weights, ax, style, output_dir, out):
+    """
+    analyze_and_plot 的實作；所有診斷訊息寫入 out 而非直接輸出。
+    """
+    if style not in STYLE_OUTPUTS:
+        raise ValueError(f"未知的繪圖樣式: {style!r} (可用: {', '.join(STYLE_OUTPUTS)})")
+    condensed = style == 'condensed'
+    default_dir, file_suffix = STYLE_OUTPUTS[style]
+    if output_dir is None:
+        output_dir = default_dir
+
+    # 濃縮版調整圖層順序：sigma 線在柱狀圖下方、標記線與文字框在最上層；
+    # 完整版沿用 Matplotlib 的預設圖層順序
+    if condensed:
+        zorders = {'hist': 2, 'curve': 3, 'marker': 4, 'sigma': 1, 'text': 10}
+    else:
+        zorders = {'hist': 1, 'curve': 2, 'marker': 2, 'sigma': 2, 'text': 3}
+
+    print(f"\n--- 正在分析: {instrument_name} ---", file=out)
+
+    # --- 2. 自動計算 ---
+    if not isinstance(raw_weights, np.ndarray):
+        raw_weights = np.array(raw_weights)
+
+    calculated_volumes = raw_weights / density
+    print(f"  {len(raw_weights)} 筆原始重量 (g): {raw_weights}", file=out)
+    print(f"  換算後的 {len(raw_weights)} 筆體積 (mL): {np.round(calculated_volumes, 4)}", file=out)
+
+    # --- 3. 執行 t-檢定 ---
+    print("  --- 雙尾 t-檢定結果 ---", file=out)
+    # 平均值、標準偏差、t 統計值與 t-分佈/KDE 曲線由 compute_pipeline 一次算出；
+    # p 值仍由 scipy 計算 (僅一次呼叫)
+    # 濃縮版不繪製 KDE，略過其計算
+    mu, sigma, t_statistic, y_curve_t, y_curve_kde = compute_pipeline(
+        raw_weights, density, target_volume, X_CURVE_STD, want_kde=not condensed)
+    p_value = 2 * stats.t.sf(abs(t_statistic), len(raw_weights) - 1)
+    print(f"  t 統計值 (t-statistic): {t_statistic:.4g}", file=out)
+    print(f"  p 值 (p-value):         {p_value:.4g}", file=out)
+
+    alpha = 0.05
+    if p_value < alpha:
+        print(f"  判讀: p < {alpha}，結果具有統計顯著性 (不準確)。", file=out)
+    else:
+        print(f"  判讀: p >= {alpha}，結果不具統計顯著性 (準確)。", file=out)
+
+    # --- 4. 繪製鐘型分佈圖 ---
+    data_to_plot = calculated_volumes
+    n = len(data_to_plot)
+    df = n - 1
+
+    # (b) 統計數據 mu, sigma 已於 t-檢定時一併算出
+
+    trimmed_mean = None
+    if not condensed:
+        # 截尾平均：排序後兩端各去除 1/6 (與 stats.trim_mean(data, 1/6) 相同)
+        sorted_volumes = np.sort(data_to_plot)
+        k = int(np.floor(n / 6))
+        trimmed_mean = sorted_volumes[k:n - k].mean()
+        print(f"  截尾平均 (Trimmed Mean): {trimmed_mean:.4g} mL", file=out)
+
+    relative_error = ((mu - target_volume) / target_volume) * 100.0
+
+    print(f"  測量平均值 (μ): {mu:.4g} mL", file=out)
+    print(f"  樣本標準偏差 (σ): {sigma:.4g} mL", file=out)
+    print(f"  相對誤差 (E_rel): {relative_error:.2f} %", file=out)
+
+    ax.clear()
+
+    # (c) 自動化 X 軸與柱狀圖
+    x_min = mu - 4*sigma
+    x_max = mu + 4*sigma
+    # 等寬分箱並以 np.bincount 計數，省去 bins='auto' 的分箱邊界搜尋
+    # 數據無變異 (x_min == x_max) 時比照 np.histogram，改以數值 ±0.5 為分箱範圍
+    hist_min, hist_max = (x_min, x_max) if x_max > x_min else (mu - 0.5, mu + 0.5)
+    nbins = max(5, int(np.sqrt(n)))
+    bin_edges = np.linspace(hist_min, hist_max, nbins + 1)
+    bin_widths = np.diff(bin_edges)
+    bin_idx = ((data_to_plot - hist_min) * nbins / (hist_max - hist_min)).astype(np.intp)
+    bin_counts = np.bincount(np.clip(bin_idx, 0, nbins - 1), minlength=nbins)
+
+    # (d) 繪製直方圖 (Histogram)
+    hist_bars = ax.bar(bin_edges[:-1], bin_counts / (n * bin_widths), width=bin_widths, align='edge', alpha=0.6,
+                       color='g', label="機率密度(來自測量值)", edgecolor='black', zorder=zorders['hist'])
+
+    # (e) 繪製鐘型曲線
+    x_curve = mu + sigma * X_CURVE_STD
+    ax.plot(x_curve, y_curve_t, 'k-', linewidth=2, rasterized=True, label=f"理論 t-分佈曲線 (df={df})",
+            zorder=zorders['curve'])
+
+    kde_peak_x = None
+    if condensed:
+        pass # 濃縮版不繪製 KDE 曲線
+    elif np.ptp(data_to_plot) < 1e-12:
+        # 數據完全無變異時無法估計 KDE，先行略過而不進入例外處理
+        print("  KDE 警告：數據無變異，無法繪製實質數據曲線", file=out)
+    else:
+        ax.plot(x_curve, y_curve_kde, 'm--', linewidth=2, rasterized=True, label='樣本密度曲線 (KDE)')
+        kde_peak_idx = np.argmax(y_curve_kde)
+        kde_peak_x = x_curve[kde_peak_idx]
+
+    # (f) 繪製標記線條
+    ax.axvline(mu, color='r', linestyle='--', linewidth=2, label=rf'測量平均值 ($\mu$) = {mu:.4g} mL',
+               zorder=zorders['marker'])
+    ax.axvline(target_volume, color='b', linestyle=':', linewidth=2, label=f'目標體積 (理論值) = {target_volume:.2f} mL',
+               zorder=zorders['marker'])
+
+    if trimmed_mean is not None:
+        ax.axvline(trimmed_mean, color='c', linestyle=':', linewidth=2.5, label=rf'截尾平均 (Trimmed) = {trimmed_mean:.4g} mL')
+
+    if kde_peak_x is not None:
+        ax.axvline(kde_peak_x, color='y', linestyle='-.', linewidth=2, label=f'樣本密度高峰 (KDE Mode) = {kde_peak_x:.4g} mL')
+
+    # 標記 1, 2, 3 倍標準差 (使用不同透明度)
+    # 六條線以單次 ax.vlines 批次繪製；先取得目前的 y 範圍並關閉自動縮放，
+    # 讓線條如 axvline 般貫穿整個圖高，也不再觸發逐條的自動縮放計算
+    y_bottom, y_top = ax.get_ylim()
+    ax.set_autoscale_on(False)
+    sigma_ks = [1, -1, 2, -2, 3, -3]
+    sigma_alphas = [1.0, 1.0, 0.6, 0.6, 0.4, 0.4]
+    ax.vlines([mu + k*sigma for k in sigma_ks], y_bottom, y_top,
+              colors=[to_rgba('purple', a) for a in sigma_alphas], linestyles=':', linewidths=1.5,
+              label=r'標準差 $\sigma$ 區間 (1, 2, 3)', zorder=zorders['sigma'])
+
+    # (g) 顯示檢定結果文字
+    text_to_display = (
+        rf"檢定方式: 單一樣本 t-檢定 (雙尾)"
+        "\n"
+        rf"虛無假設 ($H_0$): μ = {target_volume:.2f} mL"
+        "\n"
+        rf"相對誤差: {relative_error:.2f} %"
+        "\n"
+        rf"t-statistic: {t_statistic:.4g}"
+        "\n"
+        rf"p-value: {p_value:.4g}"
+    )
+    bbox_props = dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8)
+    ax.text(0.95, 0.95, text_to_display,
+             transform=ax.transAxes,
+             fontsize=12,
+             verticalalignment='top',
+             horizontalalignment='right',
+             bbox=bbox_props,
+             zorder=zorders['text'])
+
+    # (h) 設定 X 軸
+    ax.set_xlim(x_min, x_max)
+    ax.locator_params(axis='x', nbins=10) # 讓 Matplotlib 自動找漂亮的主要刻度
+    plt.setp(ax.get_xticklabels(), rotation=30, ha='right')
+
+    # 建立頂部的「標準差刻度」軸
+    ax2 = ax.secondary_xaxis('top')
+    sigma_ticks = [mu - 3*sigma, mu - 2*sigma, mu - 1*sigma, mu, mu + 1*sigma, mu + 2*sigma, mu + 3*sigma]
+    sigma_labels = [r'$\mu-3\sigma$', r'$\mu-2\sigma$', r'$\mu-1\sigma$', r'$\mu$', r'$\mu+1\sigma$', r'$\mu+2\sigma$', r'$\mu+3\sigma$']
+
+    ax2.set_xticks(sigma_ticks)
+    ax2.set_xticklabels(sigma_labels, rotation=30, ha='left', fontsize=10)
+    ax2.set_xlabel('標準差參照點', fontsize=12)
+
+
+    # (i) 圖表收尾並儲存
+    data_label = f"{instrument_name} 測量體積 (mL)"
+    ax.set_title(f'數據分佈與標準差 ({data_label})', fontsize=16)
+    ax.set_xlabel('測量體積 (mL)', fontsize=12)
+    ax.set_ylabel('機率密度', fontsize=12)
+    # ax.bar 產生的 BarContainer 在圖例中排在最後；移回第一項，維持與 ax.hist 相同的順序
+    legend_handles, legend_labels = ax.get_legend_handles_labels()
+    hist_idx = legend_handles.index(hist_bars)
+    legend_handles.insert(0, legend_handles.pop(hist_idx))
+    legend_labels.insert(0, legend_labels.pop(hist_idx))
+    if condensed:
+        ax.legend(legend_handles, legend_labels, loc='upper left') # 固定位置，省去 'best' 的重疊搜尋 (右上角為檢定結果文字框)
+        # 只開啟「水平」網格線，因為垂直線已經由紫色的 sigma 線標示了
+        ax.grid(True, axis='y', linestyle=':', alpha=0.6)
+    else:
+        ax.legend(legend_handles, legend_labels, loc='best')
+        ax.grid(True, linestyle=':', alpha=0.6)
+
+    # 建立 output 資料夾來存放圖片 (如果它不存在)
+    if not os.path.exists(output_dir):
+        try:
+            os.makedirs(output_dir)
+            print(f"  已建立儲存資料夾: {output_dir}", file=out)
+        except OSError as e:
+            print(f"  錯誤：無法建立資料夾 {output_dir}: {e}", file=out)
+            output_dir = "." # 如果失敗，儲存在當前目錄
+
+    # 移除檔名中不安全的字元
+    safe_filename = instrument_name.replace(' ', '_').replace('/', '_').replace('μ', 'u')
+    file_name = os.path.join(output_dir, f"{safe_filename}{file_suffix}")
+
+    # 儲存高解析度圖片 (300dpi)，以 bbox_inches='tight' 自動裁切邊界以防止標籤被截斷
+    # 直接交由 canvas 輸出 PNG，不經過 pyplot / Figure.savefig 的狀態處理
+    with open(file_name, 'wb') as f:
+        ax.figure.canvas.print_figure(f, format='png', dpi=300, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show() # 在本地執行時顯示圖表 (需設定 INTERACTIVE=1)
+    ax2.remove() # 移除本次的頂部刻度軸，讓下一個儀器重複使用同一個 Figure
+    print(f"  繪圖完成！已儲存高解析度圖片至: {file_name}", file=out)
+
+def analyze_and_plot(instrument_name, target_volume, density, raw_weights, ax, *,
+                     style='full', output_dir=None):
+    """
+    【數據處理核心】
+    針對單一儀器進行分析並繪圖。
+    ax 由呼叫端建立並在各儀器間重複使用，每次繪圖前會先清空。
+    style='full' 另外繪製 KDE 曲線與截尾平均；style='condensed' 為結報濃縮版，
+    sigma 線畫在柱狀圖下方且只保留水平網格線。
+    output_dir 未指定時使用 STYLE_OUTPUTS 中該樣式的預設資料夾。
+    診斷訊息先緩衝於 StringIO，結束時 (含發生錯誤時) 一次寫出；VERBOSE=0 時不輸出。
+    """
+    buf = io.StringIO()
+    try:
+        _analyze_and_plot(instrument_name, target_volume, density, raw_weights, ax,
+                          style, output_dir, buf)
+    finally:
+        if VERBOSE:
+            sys.stdout.write(buf.getvalue())
+
+def run_batch(style, output_dir=None, ax=None):
+    """
+    以指定樣式依序分析 ALL_EXPERIMENTS 中的所有儀器。
+    未傳入 ax 時自行建立一個 Figure，並於結束後關閉。
+    互動模式 (INTERACTIVE=1) 下關閉視窗會銷毀該 Figure，因此忽略 ax，
+    改為每個儀器各自建立一張圖並逐一顯示。
+    """
+    own_figure = ax is None and not INTERACTIVE
+    if own_figure:
+        # 所有儀器共用同一個 Figure/Axes，避免每次重新建立
+        fig, ax = plt.subplots(figsize=(12, 7))
+
+    print("--- 開始批次分析儀器不確定度 ---")
+
+    # 循環處理所有實驗
+    for experiment in ALL_EXPERIMENTS:
+        if INTERACTIVE:
+            fig_i, ax = plt.subplots(figsize=(12, 7))
+        try:
+            name, target, density, weights = experiment
+            # 呼叫核心函數
+            analyze_and_plot(name, target, density, weights, ax, style=style, output_dir=output_dir)
+        except Exception as e:
+            print(f"!!! 錯誤：處理 '{name}' 時發生未預期錯誤: {e} !!!")
+        finally:
+            if INTERACTIVE:
+                plt.close(fig_i)
+
+    if own_figure:
+        plt.close(fig)
+    print("\n--- 所有分析已完成 ---")
+
+# --- 主程式執行 ---
+def main():
+    """
+    主函數：在同一個行程與同一個 Figure 上依序產生完整版與濃縮版圖表
+    (互動模式下則由 run_batch 為每個儀器各自建立圖表)。
+    """
+    set_chinese_font()
+
+    if INTERACTIVE:
+        for style in STYLE_OUTPUTS:
+            run_batch(style)
+        return
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    for style in STYLE_OUTPUTS:
+        run_batch(style, ax=ax)
+    plt.close(fig)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+少量樣本統計的共用計算核心
+
+將「重量換算體積 → 平均值 → 樣本標準偏差 → t 統計值」合併為一次呼叫，
+避免 np.mean / np.std / stats.ttest_1samp 在 6 筆數據上反覆進行參數檢查。
+若已安裝 numba 則以 njit 編譯；未安裝時以純 Python/NumPy 執行，結果相同。
+
+compute_all 進一步把 t-分佈曲線與 KDE 曲線也一併算出。直接執行
+`python sample_stats.py` 會以 numba.pycc 預先編譯 (AOT) 出 stats_kernel 擴充模組，
+之後匯入本模組時若找得到 stats_kernel 便優先使用，省去 JIT 編譯時間。
+stats_kernel 是本機的編譯產物 (*.so 不納入版本控制)，其中記錄了編譯時
+stats6 / compute_all 原始碼的雜湊值；原始碼修改後舊的 stats_kernel 會被忽略
+並發出警告，需重新執行 `python sample_stats.py` 編譯。
+
+== 選用套件 ==
+pip install numba
+"""
+
+import inspect
+import math
+import os
+import warnings
+import zlib
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # 未安裝 numba：退回不編譯的版本
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def stats6(w, density, target):
+    """
+    由原始重量計算體積的平均值、樣本標準偏差 (ddof=1) 與單一樣本 t 統計值。
+    回傳 (mu, sigma, t_stat)；數據無變異 (sigma == 0) 時 t_stat 為 ±inf，
+    若平均值恰等於目標值則為 nan，與 stats.ttest_1samp 一致且不論是否安裝 numba。
+    """
+    v = w / density
+    n = len(v)
+    mu = v.mean()
+    s = ((v - mu) ** 2).sum() / (n - 1)
+    sigma = s ** 0.5
+    if sigma > 0:
+        t = (mu - target) / (sigma / n ** 0.5)
+    elif mu == target:
+        t = np.nan
+    elif mu > target:
+        t = np.inf
+    else:
+        t = -np.inf
+    return mu, sigma, t
+
+
+@njit(cache=True)
+def compute_all(w, density, target, x_std, out, want_kde):
+    """
+    單次完成整個固定流程：stats6 的統計值，加上在 x = mu + sigma * x_std 上的
+    t-分佈機率密度 (寫入 out[0]) 與 Scott 頻寬的 KDE (寫入 out[1])。
+    want_kde 為 False 時略過 KDE 的計算，out[1] 填入 nan。
+    out 須由呼叫端預先配置為 (2, len(x_std))。回傳 (mu, sigma, t_stat)。
+    數據無變異 (sigma == 0) 時無法定義曲線，out 兩列皆填入 nan。
+    """
+    mu, sigma, t = stats6(w, density, target)
+    if not sigma > 0:
+        out[:, :] = np.nan
+        return mu, sigma, t
+
+    v = w / density
+    n = len(v)
+    df = n - 1.0
+
+    # t-分佈：在標準化格點上以封閉公式計算，再以 1/sigma 換算為實際密度
+    log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    out[0, :] = np.exp(log_norm - ((df + 1) / 2) * np.log1p(x_std * x_std / df)) / sigma
+
+    if not want_kde:
+        out[1, :] = np.nan
+        return mu, sigma, t
+
+    # KDE：Scott 頻寬 = σ·n^(-1/5)，與 gaussian_kde 預設一致
+    h = sigma * n ** (-0.2)
+    x = mu + sigma * x_std
+    z = (x.reshape(-1, 1) - v.reshape(1, -1)) / h
+    out[1, :] = np.exp(-0.5 * z * z).sum(axis=1) / (n * h * math.sqrt(2 * math.pi))
+    return mu, sigma, t
+
+
+# 計算核心原始碼的雜湊值，用來辨識預先編譯的 stats_kernel 是否過期
+KERNEL_VERSION = zlib.crc32("".join(
+    inspect.getsource(getattr(f, 'py_func', f)) for f in (stats6, compute_all)).encode('utf-8'))
+
+
+def _kernel_version():
+    return KERNEL_VERSION
+
+
+# 若已預先編譯出 stats_kernel 擴充模組且與目前原始碼一致則優先使用
+try:
+    import stats_kernel as _stats_kernel
+except ImportError:
+    _stats_kernel = None
+
+# 舊版編譯產物沒有匯出 kernel_version，視同過期
+_kernel_version_fn = getattr(_stats_kernel, 'kernel_version', None)
+if _kernel_version_fn is not None and _kernel_version_fn() == KERNEL_VERSION:
+    _compiled_compute_all = _stats_kernel.compute_all
+else:
+    if _stats_kernel is not None:
+        warnings.warn("stats_kernel 與目前的 sample_stats 原始碼不一致，已改用 JIT 版本；"
+                      "請重新執行 `python sample_stats.py` 編譯")
+    _compiled_compute_all = compute_all
+
+
+def compute_pipeline(raw_weights, density, target, x_std, want_kde=True):
+    """
+    compute_all 的包裝：整理輸入型別並配置輸出陣列。
+    回傳 (mu, sigma, t_stat, y_curve_t, y_curve_kde)；want_kde=False 時 y_curve_kde 全為 nan。
+    """
+    x_std = np.ascontiguousarray(x_std, dtype=np.float64)
+    out = np.empty((2, len(x_std)))
+    w = np.ascontiguousarray(raw_weights, dtype=np.float64)
+    mu, sigma, t = _compiled_compute_all(w, float(density), float(target), x_std, out, bool(want_kde))
+    return mu, sigma, t, out[0], out[1]
+
+
+def build_aot():
+    """
+    以 numba.pycc 將 compute_all 預先編譯為 stats_kernel 擴充模組，輸出至本檔案所在資料夾。
+    """
+    from numba.pycc import CC
+
+    cc = CC('stats_kernel')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.verbose = True
+    cc.export('kernel_version', 'i8()')(_kernel_version)
+    cc.export('compute_all', 'UniTuple(f8, 3)(f8[::1], f8, f8, f8[::1], f8[:, ::1], b1)')(compute_all.py_func)
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build_aot()
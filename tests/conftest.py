@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 腳本皆位於專案根目錄，讓測試可以直接匯入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
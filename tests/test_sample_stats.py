@@ -0,0 +1,48 @@
+import numpy as np
+import scipy.stats as stats
+
+from sample_stats import compute_all, stats6
+
+
+def test_stats6_matches_scipy():
+    w = np.array([0.7517, 0.9122, 0.9343, 0.9174, 1.0165, 1.0071])
+    mu, sigma, t = stats6(w, 0.9968, 1.0)
+    v = w / 0.9968
+    assert np.isclose(mu, v.mean())
+    assert np.isclose(sigma, v.std(ddof=1))
+    assert np.isclose(t, stats.ttest_1samp(v, 1.0).statistic)
+
+
+def test_stats6_constant_input():
+    mu, sigma, t = stats6(np.ones(6), 1.0, 0.5)
+    assert mu == 1.0 and sigma == 0.0 and t == np.inf
+
+    mu, sigma, t = stats6(np.ones(6), 1.0, 1.0)
+    assert np.isnan(t)
+
+
+def test_compute_all_constant_input():
+    x_std = np.linspace(-4, 4, 11)
+    out = np.empty((2, len(x_std)))
+    mu, sigma, t = compute_all(np.ones(6), 1.0, 0.5, x_std, out, True)
+    assert sigma == 0.0 and t == np.inf
+    assert np.isnan(out).all()
+
+
+def test_compute_all_skips_kde():
+    x_std = np.linspace(-4, 4, 11)
+    out = np.empty((2, len(x_std)))
+    w = np.array([0.7517, 0.9122, 0.9343, 0.9174, 1.0165, 1.0071])
+    compute_all(w, 0.9968, 1.0, x_std, out, False)
+    assert np.isfinite(out[0]).all()
+    assert np.isnan(out[1]).all()
+
+
+def test_compute_all_matches_scipy_curves():
+    x_std = np.linspace(-4, 4, 11)
+    out = np.empty((2, len(x_std)))
+    w = np.array([0.7517, 0.9122, 0.9343, 0.9174, 1.0165, 1.0071])
+    mu, sigma, t = compute_all(w, 0.9968, 1.0, x_std, out, True)
+    x = mu + sigma * x_std
+    assert np.allclose(out[0], stats.t.pdf(x, len(w) - 1, mu, sigma), rtol=1e-12, atol=0)
+    assert np.allclose(out[1], stats.gaussian_kde(w / 0.9968)(x), rtol=1e-12, atol=0)